@@ -12,27 +12,58 @@ A Streamlit-based web application that demonstrates autonomous browser automatio
 ## Main Components:
 - `update_logs`: Function to update log messages in real-time.
 - `speed_up_gif`: Function to speed up GIFs generated during browser actions.
+- `_executor`: Thread pool that runs agent tasks off the script thread.
+- `_gif_executor`: Small thread pool for GIF processing.
+- `_get_browser`: Browser attached to your Chrome instance, shared across tasks.
+- `_cached_llm`: Process-wide cache of the LLM client for each model type.
+- `_warm_llms`: Builds the Gemini and OpenAI clients in the background at startup.
+- `_run_agent_cached`: Runs the agent and caches a snapshot of its history per task and settings.
+- `_run_agent_streaming`: Runs the agent off the script thread and shows each step as it completes.
 - The main Streamlit application logic to handle user interactions and display results.
 """
 
 import streamlit as st
-from example import get_llm
-from browser_use import Agent, Browser, BrowserConfig
+from example import get_event_loop, get_llm, warm_llms
 import asyncio
+import atexit
+import base64
+import contextlib
+import hashlib
 from dotenv import load_dotenv
 import os
 import logging
-from PIL import Image
+import orjson
+from PIL import Image, ImageSequence
 import io
+import queue
+import re
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from itertools import zip_longest
 
 # Load environment variables
 load_dotenv()
 
+def _reset_root_logger() -> None:
+    """Remove the root logger's handlers so library logs aren't echoed to the console."""
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+
+
+def _import_browser_use():
+    """Import browser_use on first use, undoing the root handler its import installs."""
+    import browser_use
+
+    _reset_root_logger()
+    return browser_use
+
+
 # Configure root logger
-root_logger = logging.getLogger()
-root_logger.setLevel(logging.INFO)
-for handler in root_logger.handlers[:]:
-    root_logger.removeHandler(handler)
+logging.getLogger().setLevel(logging.INFO)
+_reset_root_logger()
+logger = logging.getLogger(__name__)
 
 # Set page config
 st.set_page_config(
@@ -61,6 +92,16 @@ USE_PERSONAL_çBROWSER = st.sidebar.checkbox("Use Browser Instance", value=False
 # Flag to indicate whether to use vision in sidebar
 USE_VISION = st.sidebar.checkbox("Use Vision", value=False)
 
+# Number of actions the model may batch into one LLM call (one round trip per step)
+MAX_ACTIONS_PER_STEP = st.sidebar.number_input(
+    "Max Actions per Step", min_value=1, max_value=20, value=10
+)
+
+# Flag to ignore cached results and run the task again
+FORCE_RERUN = st.sidebar.checkbox(
+    "Force Re-run", value=False, help="Ignore any cached result for this task"
+)
+
 # Text input for task
 task = st.text_input(
     "Enter your task",
@@ -72,40 +113,346 @@ final_result_container = st.empty()
 agent_history_container = st.empty()
 gif_container = st.empty()
 
+def _frame_digest(frame: Image.Image) -> bytes:
+    """Hash a frame's pixels (and palette) to spot identical consecutive frames."""
+    digest = hashlib.blake2b(frame.mode.encode(), digest_size=8)
+    digest.update(frame.tobytes())
+    palette = frame.getpalette()
+    if palette:
+        digest.update(bytes(palette))
+    return digest.digest()
+
+
+def _sped_up_frames(img: Image.Image, speed_factor: int):
+    """Yield each frame of a GIF with its duration divided by speed_factor.
+
+    Runs of identical frames (e.g. while the agent waits on the LLM) are merged
+    into one frame shown for their combined duration.
+    """
+    pending = pending_digest = None
+    for frame in ImageSequence.Iterator(img):
+        duration = frame.info.get('duration', 100) // speed_factor
+        digest = _frame_digest(frame)
+        if digest == pending_digest:
+            pending.info['duration'] += duration
+            continue
+        if pending is not None:
+            yield pending
+        pending = frame.copy()
+        # Pillow's GIF writer uses each frame's own duration when none is passed
+        pending.info['duration'] = duration
+        pending_digest = digest
+    if pending is not None:
+        yield pending
+
+
+def _skip_sub_blocks(data: bytes, pos: int) -> int:
+    """Return the position just past the GIF data sub-blocks starting at pos."""
+    while data[pos]:
+        pos += data[pos] + 1
+    return pos + 1
+
+
+def _patch_gif_delays(data: bytes, speed_factor: int) -> bytes:
+    """Divide the frame delays of a GIF by speed_factor without re-encoding it.
+
+    Only the delay field of each Graphic Control Extension is rewritten; the
+    compressed image data is copied through untouched. Raises ValueError (or
+    IndexError for truncated data) when the GIF can't be patched this way.
+    """
+    if data[:6] not in (b'GIF87a', b'GIF89a'):
+        raise ValueError("Not a GIF file")
+    output = bytearray(data)
+    pos = 13
+    if data[10] & 0x80:  # global color table
+        pos += 3 << ((data[10] & 0x07) + 1)
+    has_delay = False
+    while data[pos] != 0x3B:  # trailer
+        if data[pos] == 0x21:  # extension
+            if data[pos + 1] == 0xF9:  # graphic control extension
+                if data[pos + 2] != 4:
+                    raise ValueError("Malformed graphic control extension")
+                delay = int.from_bytes(data[pos + 4:pos + 6], 'little')
+                if delay:
+                    # Browsers treat delays below 2/100s as the 1/10s default
+                    delay = max(2, delay // speed_factor)
+                output[pos + 4:pos + 6] = delay.to_bytes(2, 'little')
+                has_delay = True
+            pos = _skip_sub_blocks(data, pos + 2)
+        elif data[pos] == 0x2C:  # image descriptor
+            if not has_delay:
+                raise ValueError("Frame without a graphic control extension")
+            has_delay = False
+            flags = data[pos + 9]
+            pos += 10
+            if flags & 0x80:  # local color table
+                pos += 3 << ((flags & 0x07) + 1)
+            pos = _skip_sub_blocks(data, pos + 1)  # skip the LZW minimum code size
+        else:
+            raise ValueError(f"Unexpected GIF block 0x{data[pos]:02x}")
+    return bytes(output)
+
+
 def speed_up_gif(gif_path: str, speed_factor: int = 2):
     """Speed up GIF by reducing frame duration."""
-    with Image.open(gif_path) as img:
-        durations = []
-        for frame in range(img.n_frames):
-            img.seek(frame)
-            durations.append(img.info.get('duration', 100))
-        frames = []
-        for frame in range(img.n_frames):
-            img.seek(frame)
-            frames.append(img.copy())
+    with open(gif_path, 'rb') as f:
+        data = f.read()
+    if speed_factor == 1:
+        return data
+    try:
+        # Fast path: patch the frame delays in place and skip the re-encode
+        return _patch_gif_delays(data, speed_factor)
+    except (IndexError, ValueError):
+        pass
+    with Image.open(io.BytesIO(data)) as img:
+        if not getattr(img, 'is_animated', False):
+            return data  # a single frame has no timing to speed up
+        # Decode each frame once, in order, and stream it into the encoder. Only
+        # the frame being built is held here; Pillow's GIF writer still
+        # buffers its own (palettised) copy of each frame until it writes them.
+        frames = _sped_up_frames(img, speed_factor)
+        first = next(frames)
         output = io.BytesIO()
-        frames[0].save(
+        first.save(
             output,
             format='GIF',
-            append_images=frames[1:],
+            append_images=frames,
             save_all=True,
-            duration=[d // speed_factor for d in durations],
-            loop=0
+            loop=0,
+            # Frames keep their decoded mode/palette; skip the palette optimisation pass
+            optimize=False,
         )
         return output.getvalue()
 
 
+@st.cache_resource(show_spinner=False)
+def _executor() -> ThreadPoolExecutor:
+    """Return a process-wide pool that runs agent tasks off the script thread."""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="agent-run")
 
-if USE_PERSONAL_çBROWSER:
-    # Configure the browser to connect to your Chrome instance
-    browser = Browser(
-        config=BrowserConfig(
-            # Specify the path to your Chrome executable
-            chrome_instance_path=os.getenv('CHROME_INSTANCE_PATH', '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome'),  # macOS path
+
+@st.cache_resource(show_spinner=False)
+def _gif_executor() -> ThreadPoolExecutor:
+    """Return a small pool for GIF processing, separate from long agent runs."""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="gif")
+
+
+@st.cache_resource(show_spinner=False)
+def _cached_llm(model_type: str):
+    """Return the LLM for the given model type, built once per process."""
+    return get_llm(model_type)
+
+
+@st.cache_resource(show_spinner=False)
+def _warm_llms():
+    """Start building both LLMs on the background loop once per process."""
+    return asyncio.run_coroutine_threadsafe(warm_llms(), get_event_loop())
+
+
+# Warm the LLM clients without blocking the page so the first run starts quickly
+_warm_llms()
+
+
+class AgentRunFailed(Exception):
+    """An agent run that failed, carrying the 2x GIF it recorded (if any).
+
+    ``snapshot`` is set when the agent finished but reported errors, so the
+    caller can still show its steps.
+    """
+
+    def __init__(self, message: str, gif: bytes | None = None, snapshot: dict | None = None):
+        super().__init__(message)
+        self.gif = gif
+        self.snapshot = snapshot
+
+
+def _take_sped_up_gif(gif_path: str) -> bytes | None:
+    """Return a run's GIF at 2x speed and delete the file, or None if there's none.
+
+    The agent only records a GIF when it has screenshots, i.e. with vision on.
+    The GIF is best-effort: an unreadable one is logged and skipped so it never
+    fails an otherwise finished run.
+    """
+    try:
+        return speed_up_gif(gif_path, speed_factor=2)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not speed up GIF {gif_path}: {e}")
+        return None
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(gif_path)
+
+
+def _record_gif(agent, gif_path: str) -> bytes | None:
+    """Write the agent's history GIF to gif_path and return it at 2x speed."""
+    try:
+        agent.create_history_gif(output_path=gif_path)
+    except Exception as e:
+        logger.warning(f"Could not record GIF {gif_path}: {e}")
+    return _take_sped_up_gif(gif_path)
+
+
+async def _run_agent(agent, gif_path: str):
+    """Run the agent, then record and speed up its GIF on a worker thread.
+
+    The event loop is shared by every session's agents, so the agent is built
+    with generate_gif=False and the blocking GIF work is kept off the loop here.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        history = await agent.run()
+    except Exception as e:
+        gif_bytes = await loop.run_in_executor(_gif_executor(), _record_gif, agent, gif_path)
+        raise AgentRunFailed(str(e), gif=gif_bytes) from e
+    gif_bytes = await loop.run_in_executor(_gif_executor(), _record_gif, agent, gif_path)
+    return history, gif_bytes
+
+
+@st.cache_data(show_spinner=False, ttl=3600, max_entries=16)
+def _run_agent_cached(
+    task: str,
+    model_type: str,
+    use_vision: bool,
+    use_browser: bool,
+    max_actions_per_step: int = 10,
+    _browser=None,
+    _on_step=None,
+) -> dict:
+    """Run the agent once per task/settings and return a snapshot of its history.
+
+    The snapshot is a plain dict so identical re-runs are served from the
+    Streamlit data cache instead of driving the browser again. Failed runs raise
+    AgentRunFailed instead, so they are never cached. ``_browser`` and
+    ``_on_step`` are excluded from the cache key; ``use_browser`` stands in for
+    the browser. ``_on_step`` is called from the agent's event loop after each
+    step and must not call Streamlit itself.
+    """
+    Agent = _import_browser_use().Agent
+
+    # Each run records its own GIF so concurrent or cached runs never share one
+    gif_path = os.path.join(tempfile.gettempdir(), f"agent_history_{uuid.uuid4().hex}.gif")
+    agent = Agent(
+        task=task,
+        llm=_cached_llm(model_type),
+        use_vision=use_vision,
+        browser=_browser,
+        max_actions_per_step=max_actions_per_step,
+        generate_gif=False,
+        register_new_step_callback=_on_step,
+    )
+    history, gif_bytes = asyncio.run_coroutine_threadsafe(
+        _run_agent(agent, gif_path), get_event_loop()
+    ).result()
+
+    snapshot = {
+        "urls": history.urls(),  # List of visited URLs
+        "screenshots": history.screenshots(),  # Base64-encoded PNG screenshots
+        "action_names": history.action_names(),  # Names of executed actions
+        "extracted_content": history.extracted_content(),  # Extracted content during execution
+        "errors": history.errors(),  # Any errors that occurred
+        "model_actions": history.model_actions(),  # All actions with their parameters
+        "gif": gif_bytes,  # Execution GIF at 2x speed, kept with the run it belongs to
+    }
+    # browser-use records LLM/browser failures in the history instead of raising;
+    # raise here so a transient failure isn't replayed from the cache
+    if snapshot["errors"] and "done" not in snapshot["action_names"]:
+        raise AgentRunFailed(snapshot["errors"][-1], gif=gif_bytes, snapshot=snapshot)
+    return snapshot
+
+
+def _fenced(value) -> str:
+    """Wrap a value in a code fence longer than any backtick run inside it.
+
+    Keeps page-derived markdown (unclosed fences, headings, rules) from
+    restyling the rest of the step list it's joined into.
+    """
+    text = str(value)
+    longest = max((len(run) for run in re.findall(r"`+", text)), default=0)
+    fence = "`" * max(3, longest + 1)
+    return f"{fence}\n{text}\n{fence}"
+
+
+def _describe_step(state, model_output) -> str:
+    """Summarise an agent step (next goal, actions and URL) for live progress."""
+    actions = ", ".join(
+        name
+        for action in model_output.action
+        for name in action.model_dump(exclude_unset=True)
+    )
+    return f"{model_output.current_state.next_goal} — `{actions}` ({state.url})"
+
+
+def _run_agent_streaming(
+    task: str,
+    model_type: str,
+    use_vision: bool,
+    use_browser: bool,
+    max_actions_per_step: int = 10,
+    browser=None,
+    force_rerun: bool = False,
+) -> dict:
+    """Run _run_agent_cached on a worker thread, showing each step as it completes.
+
+    Streamlit elements can't be written from inside a cached function, so the
+    agent only queues step summaries and this (script) thread renders them.
+    With force_rerun, any cached result for these inputs is dropped first.
+    """
+    if force_rerun:
+        _run_agent_cached.clear(
+            task, model_type, use_vision, use_browser, max_actions_per_step
         )
+    steps = queue.Queue()
+    future = _executor().submit(
+        _run_agent_cached,
+        task,
+        model_type,
+        use_vision,
+        use_browser,
+        max_actions_per_step,
+        _browser=browser,
+        _on_step=lambda state, output, n: steps.put(_describe_step(state, output)),
+    )
+    live = st.empty()
+    progress = live.container()
+    step_count = 0
+    while not future.done() or not steps.empty():
+        try:
+            line = steps.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        step_count += 1
+        progress.markdown(f"**Step {step_count}:** {line}")
+    live.empty()
+    return future.result()
+
+
+def _close_browser(browser, loop: asyncio.AbstractEventLoop) -> None:
+    """Close a shared Browser on the loop it was used from."""
+    asyncio.run_coroutine_threadsafe(browser.close(), loop).result(timeout=10)
+
+
+@st.cache_resource(show_spinner=False)
+def _get_browser(chrome_instance_path: str):
+    """Return a Browser attached to your Chrome instance, reused across tasks."""
+    browser_use = _import_browser_use()
+    Browser, BrowserConfig = browser_use.Browser, browser_use.BrowserConfig
+
+    browser = Browser(
+        config=BrowserConfig(chrome_instance_path=chrome_instance_path)
     )
-else:
-    browser = None
+    atexit.register(_close_browser, browser, get_event_loop())
+    return browser
+
+
+def _show_gif(gif_bytes: bytes, heading: str, caption: str) -> None:
+    """Show a run's GIF and keep it in session state so reruns can show it again."""
+    st.session_state["last_gif"] = (gif_bytes, heading, caption)
+    with gif_container.container():
+        st.markdown(heading)
+        st.image(gif_bytes, caption=caption)
+
 
 if st.button("Run Task", type="primary"):
     if not task:
@@ -115,27 +462,41 @@ if st.button("Run Task", type="primary"):
         final_result_container.empty()
         agent_history_container.empty()
         gif_container.empty()
+        st.session_state.pop("last_gif", None)
 
-        # Create the agent with the selected model
-        agent = Agent(
-            task=task,
-            llm=get_llm(model_type),
-            use_vision=USE_VISION,
-            browser=browser,
-        )
+        if USE_PERSONAL_çBROWSER:
+            # Connect to your Chrome instance (specify the path to your Chrome executable)
+            browser = _get_browser(
+                os.getenv('CHROME_INSTANCE_PATH', '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome')  # macOS path
+            )
+        else:
+            browser = None
 
         with st.spinner("Running task..."):
             try:
-                # Run the agent and get its history object
-                history = asyncio.run(agent.run())
+                # Run the agent (or reuse the result of an identical earlier run)
+                try:
+                    result = _run_agent_streaming(
+                        task,
+                        model_type,
+                        USE_VISION,
+                        USE_PERSONAL_çBROWSER,
+                        MAX_ACTIONS_PER_STEP,
+                        browser=browser,
+                        force_rerun=FORCE_RERUN,
+                    )
+                except AgentRunFailed as e:
+                    if e.snapshot is None:
+                        raise
+                    # The agent finished with errors: show its steps (it wasn't cached)
+                    result = e.snapshot
 
-                # Use the provided API methods to get details:
-                urls = history.urls()  # List of visited URLs
-                screenshots = history.screenshots()  # List of screenshot paths
-                action_names = history.action_names()  # Names of executed actions
-                extracted_content_list = history.extracted_content()  # Extracted content during execution
-                errors = history.errors()  # Any errors that occurred
-                model_actions = history.model_actions()  # All actions with their parameters
+                urls = result["urls"]
+                screenshots = result["screenshots"]
+                action_names = result["action_names"]
+                extracted_content_list = result["extracted_content"]
+                errors = result["errors"]
+                model_actions = result["model_actions"]
 
                 # Use the last extracted content as the final result (if any)
                 final_extracted = extracted_content_list[-1] if extracted_content_list else "No result"
@@ -148,47 +509,55 @@ if st.button("Run Task", type="primary"):
 
                 # Display step-by-step details
                 st.markdown("### Steps")
-                # Determine the number of steps to display
-                steps_count = max(
-                    len(action_names),
-                    len(extracted_content_list),
-                    len(model_actions),
-                    len(urls)
+                # Build all steps into one markdown block so they're sent in a single message
+                parts = []
+                steps = zip_longest(
+                    action_names, urls, extracted_content_list, model_actions, fillvalue="N/A"
                 )
-                for i in range(steps_count):
-                    st.markdown(f"#### Step {i+1}")
-                    action = action_names[i] if i < len(action_names) else "N/A"
-                    url = urls[i] if i < len(urls) else "N/A"
-                    extracted = extracted_content_list[i] if i < len(extracted_content_list) else "N/A"
-                    model_action = model_actions[i] if i < len(model_actions) else "N/A"
-                    st.markdown(f"**Action:** {action}")
-                    st.markdown(f"**URL:** {url}")
-                    st.markdown(f"**Extracted Content:** {extracted}")
-                    st.markdown(f"**Model Action:** {model_action}")
-                    st.divider()
+                for i, (action, url, extracted, model_action) in enumerate(steps):
+                    parts.append(
+                        f"#### Step {i+1}\n"
+                        f"**Action:** {action}\n\n"
+                        f"**URL:** {url}\n\n"
+                        f"**Extracted Content:**\n{_fenced(extracted)}\n\n"
+                        f"**Model Action:**\n{_fenced(model_action)}\n\n"
+                        "---\n"
+                    )
+                st.markdown("\n".join(parts))
 
                 # Full debug view in an expander
                 with st.expander("Debug View"):
-                    st.json({
+                    # Screenshots are shown as images rather than as base64 text in the JSON
+                    if screenshots:
+                        st.image([base64.b64decode(s) for s in screenshots], width=200)
+                    debug_info = {
                         "urls": urls,
-                        "screenshots": screenshots,
                         "action_names": action_names,
                         "extracted_content": extracted_content_list,
                         "errors": errors,
                         "model_actions": model_actions,
-                    })
+                    }
+                    # orjson serialises the (large) history much faster than st.json's json.dumps
+                    st.code(
+                        orjson.dumps(debug_info, default=str, option=orjson.OPT_INDENT_2).decode(),
+                        language="json",
+                    )
 
-                # Display the generated GIF if available
-                if os.path.exists("agent_history.gif"):
-                    gif_container.markdown("### Task Execution")
-                    gif_bytes = speed_up_gif("agent_history.gif", speed_factor=2)
-                    gif_container.image(gif_bytes, caption="Task execution steps (2x speed)")
+                # Display the GIF recorded for this run if available
+                if result["gif"] is not None:
+                    _show_gif(result["gif"], "### Task Execution", "Task execution steps (2x speed)")
 
             except Exception as e:
                 final_result_container.error(f"❌ Task Failed: {str(e)}")
-                if os.path.exists("agent_history.gif"):
-                    gif_container.markdown("### Task Execution (Failed)")
-                    gif_bytes = speed_up_gif("agent_history.gif", speed_factor=2)
-                    gif_container.image(gif_bytes, caption="Task execution steps before failure (2x speed)")
+                # Only the failed run's own GIF is shown, never a leftover file
+                if isinstance(e, AgentRunFailed) and e.gif is not None:
+                    _show_gif(
+                        e.gif,
+                        "### Task Execution (Failed)",
+                        "Task execution steps before failure (2x speed)",
+                    )
                 with st.expander("Debug View"):
                     st.error(str(e))
+elif "last_gif" in st.session_state:
+    # Show the last run's GIF again on other reruns without recomputing it
+    _show_gif(*st.session_state["last_gif"])
@@ -6,34 +6,45 @@ This module provides functionality to set up Google Cloud authentication and sel
 Key Functions:
 - setup_google_auth: Initializes Google Cloud credentials for Gemini model.
 - get_llm: Returns the appropriate LLM instance based on the specified model type.
+- warm_llms: Builds both LLM instances concurrently ahead of first use.
+- get_event_loop: Returns the background event loop the cached LLMs are used on.
 - main: Executes a sample browser automation task using the selected LLM.
 """
 
 import os
+from functools import lru_cache
 from typing import Literal
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_openai import ChatOpenAI
-from browser_use import Agent
 import asyncio
+import threading
 from dotenv import load_dotenv
-from google.oauth2 import service_account
-import google.cloud.aiplatform as aiplatform
+
+# The LLM, Google Cloud and browser_use imports are deferred to where they're
+# used: each pulls in hundreds of modules and only one provider is needed per run.
 
 # Load environment variables
 load_dotenv()
 
+@lru_cache(maxsize=1)
 def setup_google_auth():
-    """Initialize Google Cloud credentials"""
+    """Initialize Google Cloud credentials (once per process)"""
+    from google.oauth2 import service_account
+    import google.cloud.aiplatform as aiplatform
+
     credentials = service_account.Credentials.from_service_account_file(
         os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
     )
     aiplatform.init(credentials=credentials)
 
+@lru_cache(maxsize=4)
 def get_llm(model_type: Literal["openai", "gemini"] = "gemini"):
-    """Factory function to get the appropriate LLM based on type"""
+    """Factory function to get the appropriate LLM based on type (cached per type)"""
     if model_type == "openai":
+        from langchain_openai import ChatOpenAI
+
         return ChatOpenAI(model="gpt-4o")
     elif model_type == "gemini":
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
         setup_google_auth()
         return ChatGoogleGenerativeAI(
             model="gemini-2.0-flash-exp",
@@ -42,7 +53,31 @@ def get_llm(model_type: Literal["openai", "gemini"] = "gemini"):
     else:
         raise ValueError(f"Unknown model type: {model_type}")
 
+@lru_cache(maxsize=1)
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return a process-wide event loop running on a background thread.
+
+    The LLM clients cached by get_llm bind to the loop they first run on, so
+    they share its process lifetime and must only be used on this loop.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="agent-loop", daemon=True).start()
+    return loop
+
+async def warm_llms():
+    """Build the OpenAI and Gemini LLMs concurrently so later get_llm calls are cached.
+
+    Errors (e.g. missing credentials for one provider) are returned, not raised.
+    """
+    return await asyncio.gather(
+        asyncio.to_thread(get_llm, "openai"),
+        asyncio.to_thread(get_llm, "gemini"),
+        return_exceptions=True,
+    )
+
 async def main():
+    from browser_use import Agent
+
     # Get model type from environment variable, default to gemini
     model_type = os.getenv("LLM_TYPE", "gemini").lower()
     
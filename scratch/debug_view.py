@@ -1,7 +1,8 @@
 import streamlit as st
 import asyncio
 import pprint
-from example import get_llm, Agent
+from example import get_event_loop, get_llm
+from browser_use import Agent
 from dotenv import load_dotenv
 import os
 import logging
@@ -32,7 +33,7 @@ if st.button("Run Task and Print Debug Output"):
             )
             
             with st.spinner("Running task..."):
-                result = asyncio.run(agent.run())
+                result = asyncio.run_coroutine_threadsafe(agent.run(), get_event_loop()).result()
                 
                 # Pretty-print the result
                 pp = pprint.PrettyPrinter(indent=2)